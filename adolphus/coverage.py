@@ -22,7 +22,8 @@ except ImportError:
 
 from .posable import Posable, SceneObject
 from .visualization import Visualizable, VISUAL_SETTINGS
-from .geometry import Angle, Point, Pose, triangle_frustum_intersection, avg_points
+from .geometry import Angle, Point, Pose, triangle_frustum_intersection, \
+    segment_occluded, triangles_bound, avg_points
 
 
 class PointCache(dict):
@@ -42,13 +43,20 @@ class PointCache(dict):
             ds = other
             dl = self
         result = type(self)(dl)
+        get = result.get
         for point, value in ds.iteritems():
-            if not point in result or result[point] < value:
+            current = get(point)
+            if current is None or current < value:
                 result[point] = value
         return result
 
     def __ior__(self, other):
-        self = self | other
+        # Merge in place rather than building a full copy as | does.
+        get = self.get
+        for point, value in other.iteritems():
+            current = get(point)
+            if current is None or current < value:
+                self[point] = value
         return self
 
     def __and__(self, other):
@@ -59,15 +67,20 @@ class PointCache(dict):
             ds = other
             dl = self
         result = type(self)(dl)
+        get = result.get
         for point, value in ds.iteritems():
-            if not point in result:
+            current = get(point)
+            if current is None or value < current:
                 result[point] = value
-            else:
-                result[point] = min(result[point], value)
         return result
 
     def __iand__(self, other):
-        self = self & other
+        # Merge in place rather than building a full copy as & does.
+        get = self.get
+        for point, value in other.iteritems():
+            current = get(point)
+            if current is None or value < current:
+                self[point] = value
         return self
 
     def __del__(self):
@@ -89,15 +102,19 @@ class PointCache(dict):
         except AttributeError:
             pass
         primitives = []
-        for point in set([point for point in self if self[point]]):
+        # The keys are already unique; iterate the items directly rather than
+        # building an intermediate set and re-hashing each point for lookups.
+        for point, value in self.iteritems():
+            if not value:
+                continue
             primitives.append({'type': 'sphere', 'pos': (point.x, point.y,
                 point.z), 'radius': 3 * VISUAL_SETTINGS['scale'],
-                'color': color, 'opacity': self[point]})
+                'color': color, 'opacity': value})
             try:
                 primitives.append({'type': 'arrow', 'pos': (point.x, point.y,
                     point.z), 'axis': tuple(point.direction_unit() * 30 * \
                     VISUAL_SETTINGS['scale']), 'color': color,
-                    'opacity': self[point]})
+                    'opacity': value})
             except AttributeError:
                 pass
         self.visual = Visualizable(primitives=primitives)
@@ -180,19 +197,26 @@ class Task(Posable):
             return self._mapped
         except AttributeError:
             self._mapped = PointCache()
-            for point in self.original:
-                self._mapped[self.pose.map(point)] = self.original[point]
+            original = self._original
+            points = original.keys()
+            for point, mapped in zip(points, self.pose.map_all(points)):
+                self._mapped[mapped] = original[point]
             return self._mapped
 
     @property
     def params(self):
         """\
-        Task parameters, with defaults filled in for missing values.
+        Task parameters, with defaults filled in for missing values. The full
+        dict is cached and rebuilt only when a parameter is set.
         """
-        params = self.defaults
-        for param in self._params:
-            params[param] = self._params[param]
-        return params
+        try:
+            return self._params_full
+        except AttributeError:
+            params = dict(self.defaults)
+            for param in self._params:
+                params[param] = self._params[param]
+            self._params_full = params
+            return params
 
     def getparam(self, param):
         """\
@@ -239,6 +263,10 @@ class Task(Posable):
         if param == 'ocular':
             value = int(value)
         self._params[param] = value
+        try:
+            del self._params_full
+        except AttributeError:
+            pass
 
     def visualize(self):
         """\
@@ -295,6 +323,7 @@ class Camera(SceneObject):
         super(Camera, self).__init__(name, pose=pose, mount_pose=mount_pose,
             mount=mount, primitives=primitives, triangles=triangles)
         self.paramcallbacks = {}
+        self.activecallbacks = {}
         self._params = {}
         for param in params:
             try:
@@ -306,6 +335,20 @@ class Camera(SceneObject):
         except KeyError:
             self.active = True
 
+    def get_active(self):
+        """\
+        The active state of this camera.
+        """
+        return self._active
+
+    def set_active(self, value):
+        self._active = value
+        # Fire active state change callbacks.
+        for callback in self.activecallbacks.values():
+            callback()
+
+    active = property(get_active, set_active)
+
     @property
     def params(self):
         """\
@@ -349,6 +392,16 @@ class Camera(SceneObject):
                 del self._mr
             except AttributeError:
                 pass
+        # The frustum hull and depth-of-field caches depend on most
+        # parameters; clear them unconditionally.
+        try:
+            del self._frustum_hull_cache
+        except AttributeError:
+            pass
+        try:
+            del self._zc_cache
+        except AttributeError:
+            pass
         # Fire parameter change callbacks.
         for callback in self.paramcallbacks.values():
             callback()
@@ -429,6 +482,14 @@ class Camera(SceneObject):
         @return: Two depth values.
         @rtype: C{tuple} of C{float}
         """
+        # The result depends only on camera parameters, so it is memoized per
+        # blur circle size; cf calls this for every point evaluated.
+        try:
+            return self._zc_cache[c]
+        except AttributeError:
+            self._zc_cache = {}
+        except KeyError:
+            pass
         r = []
         for s in [1, -1]:
             r.append((self._params['A'] * self._params['f'] \
@@ -438,7 +499,8 @@ class Camera(SceneObject):
         # If the second result is negative, it is (effectively) infinite depth.
         if r[1] <= 0:
             r[1] = float('inf')
-        return tuple(r)
+        self._zc_cache[c] = tuple(r)
+        return self._zc_cache[c]
 
     def cv(self, p, tp):
         """\
@@ -451,20 +513,23 @@ class Camera(SceneObject):
         @return: The visibility coverage component value in M{[0, 1]}.
         @rtype: C{float}
         """
+        if not p.z > 0:
+            return 0.0
+        fov = self.fov
+        xz = p.x / p.z
+        yz = p.y / p.z
         if not tp['boundary_padding']:
-            return float(p.x / p.z > self.fov['tahl'] \
-                     and p.x / p.z < self.fov['tahr'] \
-                     and p.y / p.z > self.fov['tavt'] \
-                     and p.y / p.z < self.fov['tavb']) if p.z > 0 else 0.0
+            return float(fov['tahl'] < xz < fov['tahr'] \
+                     and fov['tavt'] < yz < fov['tavb'])
         else:
             gh = tp['boundary_padding'] / \
-                float(self._params['dim'][0]) * self.fov['tah']
+                float(self._params['dim'][0]) * fov['tah']
             gv = tp['boundary_padding'] / \
-                float(self._params['dim'][1]) * self.fov['tav']
-            return min(min(max((min(p.x / p.z - self.fov['tahl'],
-                self.fov['tahr'] - p.x / p.z) / gh), 0.0), 1.0),
-                min(max((min(p.y / p.z - self.fov['tavt'], self.fov['tavb'] - \
-                p.y / p.z) / gv), 0.0), 1.0)) if p.z > 0 else 0.0
+                float(self._params['dim'][1]) * fov['tav']
+            return min(min(max((min(xz - fov['tahl'],
+                fov['tahr'] - xz) / gh), 0.0), 1.0),
+                min(max((min(yz - fov['tavt'], fov['tavb'] - \
+                yz) / gv), 0.0), 1.0))
 
     def cr(self, p, tp):
         """\
@@ -477,10 +542,15 @@ class Camera(SceneObject):
         @return: The resolution coverage component value in M{[0, 1]}.
         @rtype: C{float}
         """
-        zrmaxi = self.zres(tp['res_max'][0])
-        zrmaxa = self.zres(tp['res_max'][1])
-        zrmini = self.zres(tp['res_min'][0])
-        zrmina = self.zres(tp['res_min'][1])
+        try:
+            mr = self._mr
+        except AttributeError:
+            self.zres(1.0)
+            mr = self._mr
+        zrmaxi = mr * tp['res_max'][0]
+        zrmaxa = mr * tp['res_max'][1]
+        zrmini = mr * tp['res_min'][0]
+        zrmina = mr * tp['res_min'][1]
         if zrmaxa == zrmaxi and zrmina == zrmini:
             return float(p.z > zrmaxa and p.z < zrmina)
         elif zrmaxa == zrmaxi:
@@ -504,11 +574,13 @@ class Camera(SceneObject):
         @return: The focus coverage component value in M{[0, 1]}.
         @rtype: C{float}
         """
-        zn, zf = self.zc(tp['blur_max'][1] * min(self._params['s']))
-        if tp['blur_max'][0] == tp['blur_max'][1]:
+        blur_max = tp['blur_max']
+        ms = min(self._params['s'])
+        zn, zf = self.zc(blur_max[1] * ms)
+        if blur_max[0] == blur_max[1]:
             return float(p.z > zn and p.z < zf)
         else:
-            zl, zr = self.zc(tp['blur_max'][0] * min(self._params['s']))
+            zl, zr = self.zc(blur_max[0] * ms)
             return min(max(min((p.z - zn) / (zl - zn),
                                (zf - p.z) / (zf - zr)), 0.0), 1.0)
 
@@ -530,11 +602,20 @@ class Camera(SceneObject):
         except (ValueError, AttributeError):
             # Point is at the origin or is non-directional.
             return 1.0
-        aa = cos(tp['angle_max'][1])
-        if tp['angle_max'][0] == tp['angle_max'][1]:
+        # The cosines of the angle bounds are memoized, as this is called per
+        # point with the same task parameters.
+        key = (tp['angle_max'][0], tp['angle_max'][1])
+        try:
+            ai, aa = self._cd_cosines[key]
+        except (AttributeError, KeyError):
+            ai, aa = cos(key[0]), cos(key[1])
+            try:
+                self._cd_cosines[key] = (ai, aa)
+            except AttributeError:
+                self._cd_cosines = {key: (ai, aa)}
+        if key[0] == key[1]:
             return float(sigma > aa)
         else:
-            ai = cos(tp['angle_max'][0])
             return min(max((sigma - aa) / (ai - aa), 0.0), 1.0)
 
     def occluded_by(self, triangle, task_params):
@@ -552,9 +633,20 @@ class Camera(SceneObject):
         @return: True if occluded.
         @rtype: C{bool}
         """
-        # Build a pyramid containing the frustum.
-        hull = [Point(p[0], p[1], p[2]) \
-            for p in self.gen_frustum_hull(task_params)]
+        # Build a pyramid containing the frustum. The hull depends only on
+        # camera and task parameters (not on pose), so it is cached across the
+        # per-triangle calls made during occlusion cache updates.
+        key = (task_params['res_max'][1], task_params['res_min'][1],
+               task_params['blur_max'][1])
+        try:
+            hull = self._frustum_hull_cache[key]
+        except (AttributeError, KeyError):
+            hull = [Point(p[0], p[1], p[2]) \
+                for p in self.gen_frustum_hull(task_params)]
+            try:
+                self._frustum_hull_cache[key] = hull
+            except AttributeError:
+                self._frustum_hull_cache = {key: hull}
         # Map the triangle to camera coordinates.
         ctriangle = triangle.pose_map(self.pose.inverse())
         # Return whether an intersection exists.
@@ -575,9 +667,19 @@ class Camera(SceneObject):
         """
         # Map the point to camera coordinates.
         cp = self.pose.inverse().map(point)
-        # Return the coverage value.
-        return self.cv(cp, task_params) * self.cr(cp, task_params) \
-             * self.cf(cp, task_params) * self.cd(cp, task_params)
+        # Evaluate the cheap geometric components first, leaving the
+        # trigonometry of the view angle component for last; any zero factor
+        # zeroes the product, so return early in that case.
+        value = self.cv(cp, task_params)
+        if not value:
+            return 0.0
+        value *= self.cr(cp, task_params)
+        if not value:
+            return 0.0
+        value *= self.cf(cp, task_params)
+        if not value:
+            return 0.0
+        return value * self.cd(cp, task_params)
 
     def update_visualization(self):
         """\
@@ -678,6 +780,8 @@ class Model(dict):
         self._occlusion_cache = {}
         self._oc_updated = {}
         self._oc_needs_update = {}
+        self._oc_values = {}
+        self._oc_aabb = {}
         self._oc_mask = set()
 
     def __setitem__(self, key, value):
@@ -693,9 +797,17 @@ class Model(dict):
         value.posecallbacks['occlusion_cache'] = callback
         if hasattr(value, 'paramcallbacks'):
             value.paramcallbacks['occlusion_cache'] = callback
-        # If this is a camera, add it to the camera set.
+        # If this is a camera, add it to the camera set and register an
+        # active state change callback to invalidate the active camera cache.
         if isinstance(value, Camera):
             self.cameras.add(key)
+            def activecallback():
+                try:
+                    del self._active_cameras
+                except AttributeError:
+                    pass
+            value.activecallbacks['active_cameras'] = activecallback
+            activecallback()
         super(Model, self).__setitem__(key, value)
 
     def __delitem__(self, key):
@@ -703,6 +815,10 @@ class Model(dict):
         self[key].__del__()
         self.cameras.discard(key)
         self._oc_mask.discard(key)
+        try:
+            del self._active_cameras
+        except AttributeError:
+            pass
         super(Model, self).__delitem__(key)
 
     def __del__(self):
@@ -712,11 +828,18 @@ class Model(dict):
     @property
     def active_cameras(self):
         """\
-        The set of active cameras.
+        The set of active cameras. The set is cached and invalidated by
+        camera activation changes and membership changes; it should not be
+        mutated by the caller.
 
         @rtype: C{set}
         """
-        return set([key for key in self.cameras if self[key].active])
+        try:
+            return self._active_cameras
+        except AttributeError:
+            self._active_cameras = \
+                set([key for key in self.cameras if self[key].active])
+            return self._active_cameras
 
     def views(self, ocular=1, subset=None):
         """\
@@ -729,8 +852,18 @@ class Model(dict):
         @return: All I{k}-ocular views.
         @rtype: C{set} of C{frozenset} of C{str}
         """
-        cameras = subset or self.active_cameras
-        return set([frozenset(view) for view in combinations(cameras, ocular)])
+        # Memoized on the actual camera set, so changes to camera activation
+        # or membership simply select a different cache entry.
+        cameras = frozenset(subset or self.active_cameras)
+        try:
+            return self._views_cache[(ocular, cameras)]
+        except AttributeError:
+            self._views_cache = {}
+        except KeyError:
+            pass
+        views = set([frozenset(view) for view in combinations(cameras, ocular)])
+        self._views_cache[(ocular, cameras)] = views
+        return views
 
     @property
     def oc_mask(self):
@@ -767,6 +900,10 @@ class Model(dict):
                     except KeyError:
                         pass
             self._oc_updated[ckey][sceneobject] = True
+        # The cache was pruned in place without a rebuild, so the flattened
+        # triangle lists and their bounding boxes are stale.
+        self._oc_values = {}
+        self._oc_aabb = {}
         # Remove occlusion cache callbacks from object.
         try:
             del self[sceneobject].posecallbacks['occlusion_cache']
@@ -814,6 +951,9 @@ class Model(dict):
             self._oc_needs_update[key] = True
         elif not self._oc_needs_update[key]:
             return key
+        # The flattened triangle lists are invalidated by any rebuild.
+        self._oc_values = {}
+        self._oc_aabb = {}
         # Build a set of objects which can be occluded (e.g. cameras).
         obj_set = set(reduce(lambda a, b: a | b, [getattr(self, oc_set) \
             for oc_set in self.oc_sets]))
@@ -880,11 +1020,30 @@ class Model(dict):
         """
         if triangle_set is None:
             key = self._update_occlusion_cache(task_params)
-            triangle_set = self._occlusion_cache[key][obj].values()
-        for triangle in triangle_set:
-            if triangle.intersection(self[obj].pose.T, point, True):
-                return True
-        return False
+            # Flattening the per-object cache dict into a list is itself
+            # costly per point, so the lists are memoized (along with their
+            # aggregate bounding box) until the next cache rebuild.
+            try:
+                triangle_set = self._oc_values[(key, obj)]
+                bound = self._oc_aabb[(key, obj)]
+            except KeyError:
+                triangle_set = self._occlusion_cache[key][obj].values()
+                bound = triangles_bound(triangle_set)
+                self._oc_values[(key, obj)] = triangle_set
+                self._oc_aabb[(key, obj)] = bound
+            if bound is None:
+                return False
+            # Reject the entire set if the segment's bounding box misses the
+            # aggregate box, saving the per-triangle sweep.
+            origin = self[obj].pose.T
+            if (origin.x < bound[0] - 1e-4 and point.x < bound[0] - 1e-4) or \
+               (origin.x > bound[3] + 1e-4 and point.x > bound[3] + 1e-4) or \
+               (origin.y < bound[1] - 1e-4 and point.y < bound[1] - 1e-4) or \
+               (origin.y > bound[4] + 1e-4 and point.y > bound[4] + 1e-4) or \
+               (origin.z < bound[2] - 1e-4 and point.z < bound[2] - 1e-4) or \
+               (origin.z > bound[5] + 1e-4 and point.z > bound[5] + 1e-4):
+                return False
+        return segment_occluded(triangle_set, self[obj].pose.T, point)
 
     def strength(self, point, task_params, subset=None, triangle_set=None):
         """\
@@ -903,19 +1062,30 @@ class Model(dict):
         @rtype: C{float}
         """
         maxstrength = 0.0
+        occluded = self.occluded
+        # A camera's strength and occlusion state for the point are the same
+        # in every view it appears in, so they are evaluated at most once per
+        # camera within this call.
+        camera_strength = {}
         # If there are no views, this loop does nothing and 0.0 is returned.
         for view in self.views(ocular=task_params['ocular'], subset=subset):
             # The view has at least one camera, so minstrength will be
             # overwritten with the minimum strength within the view.
             minstrength = float('inf')
             for camera in view:
-                # Check the coverage strength for this camera.
-                strength = self[camera].strength(point, task_params)
-                # The following should short-circuit if strength = 0, and thus
-                # not incur a performance hit for the occlusion check(s).
-                if not strength or self.occluded(point, camera,
-                task_params=task_params) or (triangle_set and
-                self.occluded(point, camera, triangle_set=triangle_set)):
+                try:
+                    strength = camera_strength[camera]
+                except KeyError:
+                    # Check the coverage strength for this camera. The
+                    # occlusion check(s) are short-circuited if strength = 0,
+                    # and thus incur no performance hit.
+                    strength = self[camera].strength(point, task_params)
+                    if strength and (occluded(point, camera,
+                    task_params=task_params) or (triangle_set and
+                    occluded(point, camera, triangle_set=triangle_set))):
+                        strength = 0.0
+                    camera_strength[camera] = strength
+                if not strength:
                     minstrength = 0.0
                     break
                 elif strength < minstrength:
@@ -940,9 +1110,12 @@ class Model(dict):
         @rtype: L{PointCache}
         """
         coverage = PointCache()
+        # Bind the per-point invariants locally.
+        task_params = task.params
+        strength = self.strength
         for point in task.mapped:
             # Calculate coverage strength for each mapped task point.
-            coverage[point] = self.strength(point, task.params, subset)
+            coverage[point] = strength(point, task_params, subset)
         return coverage
 
     def performance(self, task, subset=None, coverage=None):
@@ -963,9 +1136,11 @@ class Model(dict):
         """
         coverage = coverage or self.coverage(task, subset)
         Fn, Fd = 0.0, 0.0
-        for point in coverage.keys():
-            Fn += coverage[point] * task.mapped[point]
-            Fd += task.mapped[point]
+        mapped = task.mapped
+        for point, value in coverage.iteritems():
+            weight = mapped[point]
+            Fn += value * weight
+            Fd += weight
         return Fn / Fd
 
     def performance_complex(self, task, subset=None, coverage=None):
@@ -1059,7 +1234,9 @@ class Model(dict):
                 ec = set()
                 for i in range(k - pk):
                     ec.add(sc.pop())
-                cache[subset] = cache[frozenset(sc)]
+                # Copy the cached entry, as the in-place intersections below
+                # would otherwise corrupt it for other subsets.
+                cache[subset] = PointCache(cache[frozenset(sc)])
                 while ec:
                     cache[subset] &= cache[frozenset([ec.pop()])]
                 weight = sum(cache[subset].values())
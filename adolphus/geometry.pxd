@@ -14,7 +14,8 @@ cdef class Point:
     cdef public double x, y, z
     cdef double _magnitude
     cdef Point _unit
-    cdef bool _magnitude_c, _unit_c
+    cdef long _hash
+    cdef bool _magnitude_c, _unit_c, _hash_c
     cpdef Point _add(self, Point p)
     cpdef Point _sub(self, Point p)
     cpdef Point _mul(self, double s)
@@ -30,6 +31,8 @@ cdef class Point:
 
 cdef class DirectionalPoint(Point):
     cdef public object rho, eta
+    cdef Point _dir_unit
+    cdef bool _dir_unit_c
     cpdef Point direction_unit(self)
 
 
@@ -54,6 +57,8 @@ cdef class Quaternion:
 
 cdef class Rotation:
     cdef public Quaternion Q
+    cdef double _m00, _m01, _m02, _m10, _m11, _m12, _m20, _m21, _m22
+    cdef bool _matrix_c
     cpdef Rotation _add(self, Rotation other)
     cpdef Rotation inverse(self)
     cpdef Point rotate(self, Point p)
@@ -69,6 +74,7 @@ cdef class Pose:
     cpdef Point _map(self, Point p)
     cpdef Point _dmap(self, Point p)
     cpdef Point map(self, Point p)
+    cpdef object map_all(self, object points)
 
 
 cdef class Face:
@@ -76,7 +82,8 @@ cdef class Face:
     cdef object _edges
     cdef Point _normal
     cdef Pose _planing_pose
-    cdef bool _edges_c, _normal_c, _planing_pose_c
+    cdef long _hash
+    cdef bool _edges_c, _normal_c, _planing_pose_c, _hash_c
     cpdef object edges(self)
     cpdef Point normal(self)
     cpdef Pose planing_pose(self)
@@ -86,12 +93,20 @@ cdef class Face:
 
 cdef class Triangle(Face):
     cdef Point _vertex_0, _vertex_1, _vertex_2, _edge_0, _edge_1, _edge_2
+    cdef double _bound_min_x, _bound_min_y, _bound_min_z
+    cdef double _bound_max_x, _bound_max_y, _bound_max_z
+    cdef bool _bound_c
+    cdef void _compute_bound(self)
     cpdef Triangle pose_map(self, Pose pose)
+    cpdef Triangle translate(self, Point d)
     cpdef Point intersection(self, Point origin, Point end, bool limit)
     cpdef bool overlap(self, Triangle other)
     cpdef bool has_point(self, Point p)
 
 
+cpdef object triangles_bound(object triangles)
+cpdef tuple laser_occlusion(object triangles, Point origin, Point end,
+                            Pose inverse_pose)
 cpdef bool point_in_segment(Point s1, Point s2, Point p)
 cpdef double point_segment_dis(Point s1, Point s2, Point p)
 cpdef bool segment_intersect(Point p1, Point p2, Point q1, Point q2)
@@ -8,7 +8,7 @@ geometric descriptor functions for features.
 @license: GPL-3
 """
 
-from math import pi, sqrt, sin, cos, asin, acos, atan2, copysign
+from math import pi, sqrt, sin, cos, asin, acos, atan, atan2, copysign
 from random import uniform, gauss
 from functools import reduce
 from cpython cimport bool
@@ -51,7 +51,22 @@ cdef class Point:
         self.z = z
 
     def __hash__(self):
-        return hash(repr(self))
+        """\
+        Hash function. Intentionally collides on points which are very close to
+        each other (per the canonical representation precision). The hash is
+        computed from the rounded components directly, avoiding string
+        formatting, and cached.
+        """
+        cdef long ix, iy, iz
+        if not self._hash_c:
+            ix = <long>round(self.x * 10000.0)
+            iy = <long>round(self.y * 10000.0)
+            iz = <long>round(self.z * 10000.0)
+            self._hash = (ix * 73856093) ^ (iy * 19349663) ^ (iz * 83492791)
+            if self._hash == -1:
+                self._hash = -2
+            self._hash_c = True
+        return self._hash
 
     def __reduce__(self):
         return (Point, (self.x, self.y, self.z))
@@ -275,9 +290,23 @@ cdef class DirectionalPoint(Point):
     def __hash__(self):
         """\
         Hash function. Intentionally collides on points which are very close to
-        each other (per the string representation precision).
-        """
-        return hash(repr(self))
+        each other (per the canonical representation precision). The hash is
+        computed from the rounded components directly, avoiding string
+        formatting, and cached.
+        """
+        cdef long ix, iy, iz, irho, ieta
+        if not self._hash_c:
+            ix = <long>round(self.x * 10000.0)
+            iy = <long>round(self.y * 10000.0)
+            iz = <long>round(self.z * 10000.0)
+            irho = <long>round(self.rho * 10000.0)
+            ieta = <long>round(self.eta * 10000.0)
+            self._hash = (ix * 73856093) ^ (iy * 19349663) ^ \
+                (iz * 83492791) ^ (irho * 15485863) ^ (ieta * 32452843)
+            if self._hash == -1:
+                self._hash = -2
+            self._hash_c = True
+        return self._hash
 
     def __getitem__(self, i):
         return (self.x, self.y, self.z, self.rho, self.eta).__getitem__(i)
@@ -345,11 +374,17 @@ cdef class DirectionalPoint(Point):
     cpdef Point direction_unit(self):
         """\
         Unit vector representation of the direction of this directional point.
+        This is computed on demand, then cached.
 
         @rtype: L{Point}
         """
-        return Point(sin(self.rho) * cos(self.eta),
-                     sin(self.rho) * sin(self.eta), cos(self.rho))
+        cdef double srho
+        if not self._dir_unit_c:
+            srho = sin(self.rho)
+            self._dir_unit = Point(srho * cos(self.eta),
+                                   srho * sin(self.eta), cos(self.rho))
+            self._dir_unit_c = True
+        return self._dir_unit
 
 
 cdef class Quaternion:
@@ -611,14 +646,42 @@ cdef class Rotation:
 
     cpdef Point rotate(self, Point p):
         """\
-        Rotate a vector.
+        Rotate a vector. The rotation matrix is derived from the internal
+        quaternion once and cached, reducing each subsequent rotation to nine
+        multiplications rather than two quaternion products.
 
         @param p: The vector to rotate.
         @type p: L{Point}
         @return: The rotated vector.
         @rtype: L{Point}
         """
-        return (self.Q._mul(Quaternion(0, p))._mul(self.Q.inverse())).v
+        cdef double a, b, c, d, Nq, s
+        cdef double B, C, D, aB, aC, aD, bB, bC, bD, cC, cD, dD
+        if not self._matrix_c:
+            a = self.Q.a
+            b, c, d = self.Q.v.x, self.Q.v.y, self.Q.v.z
+            Nq = a * a + b * b + c * c + d * d
+            if Nq > 0:
+                s = 2.0 / Nq
+            else:
+                s = 0.0
+            B = b * s; C = c * s; D = d * s
+            aB = a * B; aC = a * C; aD = a * D
+            bB = b * B; bC = b * C; bD = b * D
+            cC = c * C; cD = c * D; dD = d * D
+            self._m00 = 1.0 - (cC + dD)
+            self._m01 = bC - aD
+            self._m02 = bD + aC
+            self._m10 = bC + aD
+            self._m11 = 1.0 - (bB + dD)
+            self._m12 = cD - aB
+            self._m20 = bD - aC
+            self._m21 = cD + aB
+            self._m22 = 1.0 - (bB + cC)
+            self._matrix_c = True
+        return Point(self._m00 * p.x + self._m01 * p.y + self._m02 * p.z,
+                     self._m10 * p.x + self._m11 * p.y + self._m12 * p.z,
+                     self._m20 * p.x + self._m21 * p.y + self._m22 * p.z)
 
     @classmethod
     def from_rotation_matrix(cls, R):
@@ -889,6 +952,48 @@ cdef class Pose:
         else:
             return self._map(p)
 
+    cpdef object map_all(self, object points):
+        """\
+        Map a sequence of points/vectors through this pose. The rotation
+        matrix is derived from the internal quaternion once and applied with
+        scalar arithmetic, rather than performing two quaternion products per
+        point as L{map} does.
+
+        @param points: The points/vectors to transform.
+        @type points: C{list} of L{Point}
+        @return: The mapped points/vectors.
+        @rtype: C{list} of L{Point}
+        """
+        cdef double r00, r01, r02, r10, r11, r12, r20, r21, r22
+        cdef double tx, ty, tz, x, y, z, ux, uy, uz, rho, eta
+        cdef Point p, u
+        R = self.R.to_rotation_matrix()
+        r00, r01, r02 = R[0][0], R[0][1], R[0][2]
+        r10, r11, r12 = R[1][0], R[1][1], R[1][2]
+        r20, r21, r22 = R[2][0], R[2][1], R[2][2]
+        tx, ty, tz = self.T.x, self.T.y, self.T.z
+        result = []
+        for p in points:
+            x = r00 * p.x + r01 * p.y + r02 * p.z + tx
+            y = r10 * p.x + r11 * p.y + r12 * p.z + ty
+            z = r20 * p.x + r21 * p.y + r22 * p.z + tz
+            if type(p) is DirectionalPoint:
+                u = p.direction_unit()
+                ux = r00 * u.x + r01 * u.y + r02 * u.z
+                uy = r10 * u.x + r11 * u.y + r12 * u.z
+                uz = r20 * u.x + r21 * u.y + r22 * u.z
+                if uz > 1.0:
+                    rho = 0.0
+                elif uz < -1.0:
+                    rho = pi
+                else:
+                    rho = acos(uz)
+                eta = atan2(uy, ux)
+                result.append(DirectionalPoint(x, y, z, rho, eta))
+            else:
+                result.append(Point(x, y, z))
+        return result
+
 
 cdef class Face:
     """\
@@ -907,7 +1012,14 @@ cdef class Face:
         return (Face, (self.vertices,))
 
     def __hash__(self):
-        return hash(self.vertices)
+        """\
+        Hash function. The hash is computed from the vertices once and cached,
+        as faces are hashed repeatedly by the occlusion cache.
+        """
+        if not self._hash_c:
+            self._hash = hash(self.vertices)
+            self._hash_c = True
+        return self._hash
 
     def __repr__(self):
         """\
@@ -1018,7 +1130,14 @@ cdef class Triangle(Face):
         self._edge_2 = self.edges()[2]
 
     def __hash__(self):
-        return hash(self.vertices)
+        """\
+        Hash function. The hash is computed from the vertices once and cached,
+        as triangles are hashed repeatedly by the occlusion cache.
+        """
+        if not self._hash_c:
+            self._hash = hash(self.vertices)
+            self._hash_c = True
+        return self._hash
 
     def __richcmp__(self, Triangle tri, int t):
         eq = (self.vertices[0] - tri.vertices[0]).magnitude() < 1e-4 and \
@@ -1029,6 +1148,25 @@ cdef class Triangle(Face):
         if t == 3:
             return not eq
 
+    cdef void _compute_bound(self):
+        """\
+        Compute the axis-aligned bounding box of this triangle, used to cull
+        intersection candidates cheaply.
+        """
+        self._bound_min_x = min(self._vertex_0.x, self._vertex_1.x,
+            self._vertex_2.x)
+        self._bound_min_y = min(self._vertex_0.y, self._vertex_1.y,
+            self._vertex_2.y)
+        self._bound_min_z = min(self._vertex_0.z, self._vertex_1.z,
+            self._vertex_2.z)
+        self._bound_max_x = max(self._vertex_0.x, self._vertex_1.x,
+            self._vertex_2.x)
+        self._bound_max_y = max(self._vertex_0.y, self._vertex_1.y,
+            self._vertex_2.y)
+        self._bound_max_z = max(self._vertex_0.z, self._vertex_1.z,
+            self._vertex_2.z)
+        self._bound_c = True
+
     cpdef Triangle pose_map(self, Pose pose):
         """\
         Map triangle through a pose.
@@ -1042,6 +1180,21 @@ cdef class Triangle(Face):
                         pose._map(self._vertex_1),
                         pose._map(self._vertex_2))
 
+    cpdef Triangle translate(self, Point d):
+        """\
+        Return a copy of this triangle translated by the given vector. This is
+        cheaper than mapping through a translation-only pose, as no rotation
+        is applied.
+
+        @param d: The translation vector.
+        @type d: L{Point}
+        @return: The translated triangle.
+        @rtype: L{Triangle}
+        """
+        return Triangle(self._vertex_0._add(d),
+                        self._vertex_1._add(d),
+                        self._vertex_2._add(d))
+
     cpdef Point intersection(self, Point origin, Point end, bool limit):
         """\
         Return the point of intersection of the line or line segment between the
@@ -1059,27 +1212,47 @@ cdef class Triangle(Face):
         @return: The point of intersection.
         @rtype: L{Point}
         """
-        cdef Point origin_end, direction, P, T, Q
+        # The algorithm is expanded over scalar components so that no
+        # intermediate Point objects are allocated per test.
+        cdef double ox, oy, oz, dx, dy, dz, mag
+        cdef double e0x, e0y, e0z, n2x, n2y, n2z
+        cdef double px, py, pz, tx, ty, tz, qx, qy, qz
         cdef double det, inv_det, u, v, t
-        origin_end = end._sub(origin)
-        direction = origin_end.unit()
-        P = direction.cross(self._edge_2._neg())
-        det = self._edge_0.dot(P)
+        ox, oy, oz = origin.x, origin.y, origin.z
+        dx = end.x - ox
+        dy = end.y - oy
+        dz = end.z - oz
+        mag = sqrt(dx * dx + dy * dy + dz * dz)
+        if mag == 0:
+            raise ValueError('cannot normalize a zero vector')
+        dx /= mag
+        dy /= mag
+        dz /= mag
+        e0x, e0y, e0z = self._edge_0.x, self._edge_0.y, self._edge_0.z
+        n2x, n2y, n2z = -self._edge_2.x, -self._edge_2.y, -self._edge_2.z
+        px = dy * n2z - dz * n2y
+        py = dz * n2x - dx * n2z
+        pz = dx * n2y - dy * n2x
+        det = e0x * px + e0y * py + e0z * pz
         if det > -1e-4 and det < 1e-4:
             return None
         inv_det = 1.0 / det
-        T = origin._sub(self._vertex_0)
-        u = (T.dot(P)) * inv_det
+        tx = ox - self._vertex_0.x
+        ty = oy - self._vertex_0.y
+        tz = oz - self._vertex_0.z
+        u = (tx * px + ty * py + tz * pz) * inv_det
         if u < 0 or u > 1.0:
             return None
-        Q = T.cross(self._edge_0)
-        v = (direction.dot(Q)) * inv_det
+        qx = ty * e0z - tz * e0y
+        qy = tz * e0x - tx * e0z
+        qz = tx * e0y - ty * e0x
+        v = (dx * qx + dy * qy + dz * qz) * inv_det
         if v < 0 or u + v > 1.0:
             return None
-        t = (Q.dot(self._edge_2._neg())) * inv_det
-        if limit and (t < 1e-04 or t > origin_end.magnitude() - 1e-04):
+        t = (qx * n2x + qy * n2y + qz * n2z) * inv_det
+        if limit and (t < 1e-04 or t > mag - 1e-04):
             return None
-        return origin._add(direction._mul(t))
+        return Point(ox + dx * t, oy + dy * t, oz + dz * t)
 
     cpdef bool overlap(self, Triangle other):
         """\
@@ -1095,18 +1268,35 @@ cdef class Triangle(Face):
         """
         cdef Triangle triangle
         cdef int i, axis, odd
-        cdef float dv
-        dvs = {}
-        dvs[other] = [other.vertices[i].dot(self.normal()) + \
-            (self.vertices[0].dot(self.normal()._neg())) for i in range(3)]
-        if all([dv > 1e-4 for dv in dvs[other]]) \
-        or all([dv < -1e-4 for dv in dvs[other]]):
+        cdef Point sn, on
+        cdef double sd, od, dvo0, dvo1, dvo2, dvs0, dvs1, dvs2
+        # The signed plane distances are computed over scalars, so that the
+        # common early rejections allocate no intermediate objects.
+        sn = self.normal()
+        sd = -(sn.x * self._vertex_0.x + sn.y * self._vertex_0.y + \
+               sn.z * self._vertex_0.z)
+        dvo0 = sn.x * other._vertex_0.x + sn.y * other._vertex_0.y + \
+               sn.z * other._vertex_0.z + sd
+        dvo1 = sn.x * other._vertex_1.x + sn.y * other._vertex_1.y + \
+               sn.z * other._vertex_1.z + sd
+        dvo2 = sn.x * other._vertex_2.x + sn.y * other._vertex_2.y + \
+               sn.z * other._vertex_2.z + sd
+        if (dvo0 > 1e-4 and dvo1 > 1e-4 and dvo2 > 1e-4) \
+        or (dvo0 < -1e-4 and dvo1 < -1e-4 and dvo2 < -1e-4):
             return False
-        dvs[self] = [self.vertices[i].dot(other.normal()) + \
-            (other.vertices[0].dot(other.normal()._neg())) for i in range(3)]
-        if all([dv > 1e-4 for dv in dvs[self]]) \
-        or all([dv < -1e-4 for dv in dvs[self]]):
+        on = other.normal()
+        od = -(on.x * other._vertex_0.x + on.y * other._vertex_0.y + \
+               on.z * other._vertex_0.z)
+        dvs0 = on.x * self._vertex_0.x + on.y * self._vertex_0.y + \
+               on.z * self._vertex_0.z + od
+        dvs1 = on.x * self._vertex_1.x + on.y * self._vertex_1.y + \
+               on.z * self._vertex_1.z + od
+        dvs2 = on.x * self._vertex_2.x + on.y * self._vertex_2.y + \
+               on.z * self._vertex_2.z + od
+        if (dvs0 > 1e-4 and dvs1 > 1e-4 and dvs2 > 1e-4) \
+        or (dvs0 < -1e-4 and dvs1 < -1e-4 and dvs2 < -1e-4):
             return False
+        dvs = {other: [dvo0, dvo1, dvo2], self: [dvs0, dvs1, dvs2]}
         if all([abs(dv) < 1e-4 for dv in dvs[self]]):
             # project both triangles onto axis-aligned plane.
             pose1 = self.planing_pose()
@@ -1264,6 +1454,150 @@ cpdef bool segment_intersect(Point p1, Point p2, Point q1, Point q2):
         return True
     return False
 
+cpdef bool segment_occluded(object triangles, Point origin, Point end):
+    """\
+    Return whether the line segment between the two given points intersects
+    any triangle in the given set. This is equivalent to testing
+    L{Triangle.intersection} (with C{limit}) over the set, but factors the
+    segment direction and length out of the loop and performs the entire
+    sweep in a single call.
+
+        - T. Moller and B. Trumbore, "Fast, Minimum Storage Ray/Triangle
+          Intersection," J. Graphics Tools, vol. 2, no. 1, pp. 21-28, 1997.
+
+    @param triangles: The set of triangles to check.
+    @type triangles: C{list} of L{Triangle}
+    @param origin: The origin of the segment.
+    @type origin: L{Point}
+    @param end: The end of the segment.
+    @type end: L{Point}
+    @return: True if any triangle intersects the segment.
+    @rtype: C{bool}
+    """
+    cdef Triangle triangle
+    cdef Point origin_end, direction, P, T, Q
+    cdef double det, inv_det, u, v, t, length
+    cdef double min_x, min_y, min_z, max_x, max_y, max_z
+    if not triangles:
+        return False
+    origin_end = end._sub(origin)
+    direction = origin_end.unit()
+    length = origin_end.magnitude()
+    # Bounding box of the segment, for cheap candidate culling.
+    min_x = (origin.x if origin.x < end.x else end.x) - 1e-4
+    min_y = (origin.y if origin.y < end.y else end.y) - 1e-4
+    min_z = (origin.z if origin.z < end.z else end.z) - 1e-4
+    max_x = (origin.x if origin.x > end.x else end.x) + 1e-4
+    max_y = (origin.y if origin.y > end.y else end.y) + 1e-4
+    max_z = (origin.z if origin.z > end.z else end.z) + 1e-4
+    for triangle in triangles:
+        if not triangle._bound_c:
+            triangle._compute_bound()
+        if triangle._bound_min_x > max_x or triangle._bound_max_x < min_x \
+        or triangle._bound_min_y > max_y or triangle._bound_max_y < min_y \
+        or triangle._bound_min_z > max_z or triangle._bound_max_z < min_z:
+            continue
+        P = direction.cross(triangle._edge_2._neg())
+        det = triangle._edge_0.dot(P)
+        if det > -1e-4 and det < 1e-4:
+            continue
+        inv_det = 1.0 / det
+        T = origin._sub(triangle._vertex_0)
+        u = (T.dot(P)) * inv_det
+        if u < 0 or u > 1.0:
+            continue
+        Q = T.cross(triangle._edge_0)
+        v = (direction.dot(Q)) * inv_det
+        if v < 0 or u + v > 1.0:
+            continue
+        t = (Q.dot(triangle._edge_2._neg())) * inv_det
+        if t < 1e-04 or t > length - 1e-04:
+            continue
+        return True
+    return False
+
+
+cpdef object triangles_bound(object triangles):
+    """\
+    Return the aggregate axis-aligned bounding box of a set of triangles, as a
+    C{(min x, min y, min z, max x, max y, max z)} tuple, or None if the set is
+    empty. Useful for rejecting an entire occlusion set in a few comparisons.
+
+    @param triangles: The set of triangles.
+    @type triangles: C{list} of L{Triangle}
+    @return: The aggregate bounding box.
+    @rtype: C{tuple} of C{float}
+    """
+    cdef Triangle triangle
+    cdef double bxl, byl, bzl, bxh, byh, bzh
+    cdef bool first
+    first = True
+    bxl = byl = bzl = bxh = byh = bzh = 0.0
+    for triangle in triangles:
+        if not triangle._bound_c:
+            triangle._compute_bound()
+        if first:
+            bxl, byl, bzl = triangle._bound_min_x, triangle._bound_min_y, \
+                triangle._bound_min_z
+            bxh, byh, bzh = triangle._bound_max_x, triangle._bound_max_y, \
+                triangle._bound_max_z
+            first = False
+            continue
+        if triangle._bound_min_x < bxl:
+            bxl = triangle._bound_min_x
+        if triangle._bound_min_y < byl:
+            byl = triangle._bound_min_y
+        if triangle._bound_min_z < bzl:
+            bzl = triangle._bound_min_z
+        if triangle._bound_max_x > bxh:
+            bxh = triangle._bound_max_x
+        if triangle._bound_max_y > byh:
+            byh = triangle._bound_max_y
+        if triangle._bound_max_z > bzh:
+            bzh = triangle._bound_max_z
+    if first:
+        return None
+    return (bxl, byl, bzl, bxh, byh, bzh)
+
+
+cpdef tuple laser_occlusion(object triangles, Point origin, Point end,
+                            Pose inverse_pose):
+    """\
+    Return whether the line from the origin to the given end point strikes any
+    triangle in the given set before reaching it, plus the incidence angle (in
+    the frame given by the inverse pose) of a triangle surface coincident with
+    the end point, if any. This runs the per-triangle sweep of the laser
+    occlusion check in a single call.
+
+    @param triangles: The set of triangles to check.
+    @type triangles: C{list} of L{Triangle}
+    @param origin: The origin of the projection (laser apex).
+    @type origin: L{Point}
+    @param end: The end point of the projection.
+    @type end: L{Point}
+    @param inverse_pose: The inverse of the projecting object's pose.
+    @type inverse_pose: L{Pose}
+    @return: True if occluded, plus incidence angle.
+    @rtype: C{bool}, C{float}
+    """
+    cdef Triangle triangle
+    cdef Point ip, ln
+    cdef double d, di
+    angle = None
+    d = origin.euclidean(end)
+    for triangle in triangles:
+        ip = triangle.intersection(origin, end, False)
+        if ip is None:
+            continue
+        di = origin.euclidean(ip)
+        if di < d - 1e-4:
+            return True, None
+        if abs(di - d) < 1e-4:
+            ln = inverse_pose._map(triangle.normal())
+            angle = atan(ln.x / ln.z)
+    return False, angle
+
+
 cdef int which_side(object points, Point direction, Point vertex):
     """\
     Check which side of the projection of the given vertex onto the given
@@ -8,10 +8,11 @@ modeling laser line based range imaging cameras.
 @license: GPL-3
 """
 
-from math import pi, sin, tan, atan
+from math import pi, sin, tan
 from copy import copy
 
-from .geometry import Angle, Pose, Point, DirectionalPoint, Triangle
+from .geometry import Angle, Pose, Point, DirectionalPoint, Triangle, \
+    laser_occlusion
 from .coverage import PointCache, Task, Camera, Model
 from .posable import SceneObject
 
@@ -113,9 +114,27 @@ class LineLaser(SceneObject):
             del self._triangle
         except AttributeError:
             pass
+        try:
+            del self._half_fan_tan
+        except AttributeError:
+            pass
         for callback in self.paramcallbacks.values():
             callback()
 
+    @property
+    def half_fan_tan(self):
+        """\
+        Precomputed tangent of the laser half fan angle. This is cached for
+        efficiency.
+
+        @rtype: C{float}
+        """
+        try:
+            return self._half_fan_tan
+        except AttributeError:
+            self._half_fan_tan = tan(self._params['fan'] / 2.0)
+            return self._half_fan_tan
+
     @property
     def triangle(self):
         """\
@@ -124,7 +143,7 @@ class LineLaser(SceneObject):
         try:
             return self._triangle
         except AttributeError:
-            width = self._params['depth'] * tan(self._params['fan'] / 2.0)
+            width = self._params['depth'] * self.half_fan_tan
             self._triangle = Triangle(self.pose.T,
                 self.pose._map(Point(-width, 0, self._params['depth'])),
                 self.pose._map(Point(width, 0, self._params['depth'])))
@@ -149,7 +168,7 @@ class LineLaser(SceneObject):
         @return: Triangle primitives.
         @rtype: C{list} of C{dict}
         """
-        width = self._params['depth'] * tan(self._params['fan'] / 2.0)
+        width = self._params['depth'] * self.half_fan_tan
         return [{'type': 'curve', 'color': (1, 0, 0),
             'pos': [(0, 0, 0), (-width, 0, self._params['depth']),
             (width, 0, self._params['depth']), (0, 0, 0)]}]
@@ -239,9 +258,21 @@ class RangeCamera(Camera):
                 raise ValueError('point is not aligned for range coverage')
         except AttributeError:
             raise TypeError('point must be directional for range coverage')
-        return self.cv(cp, task_params) * self.cr(cp, task_params) \
-             * self.cf(cp, task_params) * self.cd(cp, task_params) \
-             * self.ch(cp, task_params)
+        # As in Camera.strength, evaluate the cheap components first and
+        # short-circuit on any zero factor before the trigonometric ones.
+        value = self.cv(cp, task_params)
+        if not value:
+            return 0.0
+        value *= self.cr(cp, task_params)
+        if not value:
+            return 0.0
+        value *= self.cf(cp, task_params)
+        if not value:
+            return 0.0
+        value *= self.cd(cp, task_params)
+        if not value:
+            return 0.0
+        return value * self.ch(cp, task_params)
 
 
 class RangeModel(Model):
@@ -316,20 +347,13 @@ class RangeModel(Model):
                 task_params=task_params, triangle_set=triangle_set)
         if triangle_set is None:
             key = self._update_occlusion_cache(task_params)
-            triangle_set = self._occlusion_cache[key][obj].values()
-        d = self[obj].pose.T.euclidean(point)
-        angle = None
-        for triangle in triangle_set:
-            ip = triangle.intersection(self[obj].pose.T, point, False)
-            if not ip:
-                continue
-            di = self[obj].pose.T.euclidean(ip)
-            if di < d - 1e-4:
-                return True, None
-            if abs(di - d) < 1e-4:
-                ln = self[obj].pose.inverse()._map(triangle.normal())
-                angle = atan(ln.x / ln.z)
-        return False, angle
+            try:
+                triangle_set = self._oc_values[(key, obj)]
+            except KeyError:
+                triangle_set = self._occlusion_cache[key][obj].values()
+                self._oc_values[(key, obj)] = triangle_set
+        pose = self[obj].pose
+        return laser_occlusion(triangle_set, pose.T, point, pose.inverse())
 
     class Transport(object):
         """\
@@ -395,7 +419,7 @@ class RangeModel(Model):
             @return: The recursive set of triangles.
             @rtype: C{list} of L{Triangle}
             """
-            triangles = [t.mapped_triangle() for t in sceneobject.triangles]
+            triangles = list(sceneobject.mapped_triangles())
             for child in sceneobject.children:
                 if isinstance(child, SceneObject):
                     triangles += self.get_triangles(child)
@@ -471,23 +495,31 @@ class RangeModel(Model):
                     DirectionalPoint(0, 0, 0, pi, 0))[3:5]
                 # Store the original set of mapped task points of the task.
                 task_original = PointCache(self.task.mapped)
+                # Since the transport is a pure translation, the triangles at
+                # the original pose need only be gathered once and shifted per
+                # point, rather than re-posing the object and re-mapping its
+                # triangles at every stop.
+                base_triangles = self.get_triangles(self.tobject)
+                # Bind the loop invariants locally; the laser triangle and
+                # transport axis are fixed for the whole transport.
+                intersection = self.laser.triangle.intersection
+                taxis = self.taxis
+                cache = self._transport_cache
                 for point in task_original:
-                    lp = self.laser.triangle.intersection(point,
-                        point + self.taxis, False)
+                    lp = intersection(point, point._add(taxis), False)
                     # If no intersection exists, point not covered by the laser.
                     if lp is None:
-                        self._transport_cache.append((point, None, None))
-                        yield self._transport_cache[-1]
+                        cache.append((point, None, None))
+                        yield cache[-1]
                         continue
                     # Translate the object so the point lies in the laser plane.
-                    pose = Pose(T=(lp - point))
-                    self.tobject.absolute_pose = self.original_pose + pose
+                    offset = lp._sub(point)
+                    triangles = [triangle.translate(offset) \
+                        for triangle in base_triangles]
                     # Yield the mapped directional point.
-                    mp = pose._map(point)
-                    triangles = self.get_triangles(self.tobject)
-                    self._transport_cache.append((point, DirectionalPoint(mp.x,
-                        mp.y, mp.z, rho, eta), triangles))
-                    yield self._transport_cache[-1]
+                    cache.append((point, DirectionalPoint(lp.x,
+                        lp.y, lp.z, rho, eta), triangles))
+                    yield cache[-1]
 
     def range_coverage(self, task, transport, subset=None, **kwargs):
         """\
@@ -510,22 +542,49 @@ class RangeModel(Model):
         if not isinstance(task, RangeTask):
             raise TypeError('task is not a range coverage task')
         coverage = PointCache()
+        # Accumulate point-strength pairs and load the cache in a single bulk
+        # update, rather than hashing into the cache one point at a time.
+        results = []
         # Give the transport object a task context (required).
         transport.task = task
+        # The laser and its pose are fixed for the duration of the sweep, so
+        # resolve the object, pose, inverse pose and scene occlusion triangles
+        # once here instead of once per point inside occluded().
+        laser = self[self.active_laser]
+        laser_triangle = laser.triangle
+        # The params property rebuilds its dict on every access, so resolve it
+        # once for the whole sweep.
+        task_params = task.params
+        inc_angle_max = task_params['inc_angle_max']
+        laser_origin = laser.pose.T
+        laser_inverse = laser.pose.inverse()
         with transport:
+            # The transported object is masked out of the occlusion cache by
+            # the transport context, so the scene triangle snapshot must be
+            # taken inside it lest the target occlude itself.
+            key = self._update_occlusion_cache()
+            scene_triangles = \
+                self._occlusion_cache[key][self.active_laser].values()
             for point, mdp, triangles in transport.transport():
                 if not mdp:
-                    coverage[point] = 0.0
+                    results.append((point, 0.0))
                     continue
+                # Only triangles crossing the laser plane can occlude the
+                # laser or contribute an incidence angle, so cull the
+                # transported set against it first. The full set is retained
+                # for camera occlusion below.
+                fan_triangles = [t for t in triangles \
+                    if laser_triangle.overlap(t)]
                 # Compute the laser coverage (occlusion and incidence angle).
-                occluded = self.occluded(mdp, self.active_laser)[0]
-                toccluded, inc_angle = self.occluded(mdp, self.active_laser,
-                                                     triangle_set=triangles)
-                if occluded or toccluded \
-                    or inc_angle > task.params['inc_angle_max']:
-                    coverage[point] = 0.0
+                occluded = laser_occlusion(scene_triangles, laser_origin,
+                    mdp, laser_inverse)[0]
+                toccluded, inc_angle = laser_occlusion(fan_triangles,
+                    laser_origin, mdp, laser_inverse)
+                if occluded or toccluded or inc_angle > inc_angle_max:
+                    results.append((point, 0.0))
                     continue
                 # Compute the camera coverage.
-                coverage[point] = self.strength(mdp, task.params, subset=subset,
-                    triangle_set=triangles)
+                results.append((point, self.strength(mdp, task_params,
+                    subset=subset, triangle_set=triangles)))
+        coverage.update(results)
         return coverage
@@ -256,8 +256,27 @@ class SceneObject(Posable, Visualizable):
             del self._bounding_box
         except AttributeError:
             pass
+        try:
+            del self._mapped_triangles
+        except AttributeError:
+            pass
         Posable._pose_changed_hook(self)
 
+    def mapped_triangles(self):
+        """\
+        Return the pose-mapped occlusion triangles of this object. The list is
+        cached and rebuilt lazily on pose change.
+
+        @return: The mapped triangles.
+        @rtype: C{list} of L{Triangle}
+        """
+        try:
+            return self._mapped_triangles
+        except AttributeError:
+            self._mapped_triangles = \
+                [triangle.mapped_triangle() for triangle in self.triangles]
+            return self._mapped_triangles
+
     def toggle_triangles(self):
         """\
         Toggle display of occluding triangles in the visualization. This fades
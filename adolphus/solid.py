@@ -59,6 +59,10 @@ class RenderDynamic(object):
         self.collada_indices = []
         n = 0
         stable = []
+        # Hash-based indexes over the vertex and edge lists; the linear list
+        # scans they replace made this quadratic in model size.
+        vertex_index = {}
+        edge_seen = set()
         for item in self._originals:
             try:
                 self.normals.append(item.normal())
@@ -68,14 +72,16 @@ class RenderDynamic(object):
             j = 2
             for i in [0,1,2]:
                 _edge = (item.vertices[i], item.vertices[j])
-                if _edge not in self.edges and \
-                    (item.vertices[j], item.vertices[i]) not in self.edges:
+                if _edge not in edge_seen:
                     self.edges.append(_edge)
-                if item.vertices[i] not in self.vertices:
+                    edge_seen.add(_edge)
+                    edge_seen.add((item.vertices[j], item.vertices[i]))
+                if item.vertices[i] not in vertex_index:
+                    vertex_index[item.vertices[i]] = len(self.vertices)
                     self.vertices.append(item.vertices[i])
                 j = i
             for vertex in item.vertices:
-                self.collada_indices.append(self.vertices.index(vertex))
+                self.collada_indices.append(vertex_index[vertex])
                 self.collada_indices.append(n)
             n += 1
         del self._originals
@@ -471,6 +477,10 @@ class Solid(RenderDynamic, SceneObject):
                 triangle.visible = False
         except:
             pass
+        try:
+            del self._mapped_triangles
+        except AttributeError:
+            pass
         del self.triangles
         occ_triangle = []
         for triangle in self.faces:
@@ -292,27 +292,40 @@ class YAMLParser(object):
         zr = rangify(zr)
         rhor = rangify(rhor)
         etar = rangify(etar)
-        x, y, z = xr[0], yr[0], zr[0]
-        while x <= xr[1]:
-            while y <= yr[1]:
-                while z <= zr[1]:
+        # The set of discrete directions is identical for every spatial point
+        # in the range, so it is computed once up front rather than re-sweeping
+        # the rho and eta ranges per point. This also restarts eta for each
+        # rho ring, which the nested sweep failed to do.
+        if ddiv:
+            directions = []
+            rho = rhor[0]
+            while rho - rhor[1] < 1e-4 and rho - pi < 1e-4:
+                if abs(rho) < 1e-4 or abs(rho - pi) < 1e-4:
+                    directions.append((rho, 0.0))
+                else:
+                    eta = etar[0]
+                    while eta - etar[1] < 1e-4 and eta < 2 * pi:
+                        directions.append((rho, eta))
+                        eta += pi / ddiv
+                rho += pi / ddiv
+        # Step the spatial grid by integer counts; accumulating the float step
+        # drifts over long ranges and can drop the final sample.
+        def count(r):
+            if r[1] < r[0]:
+                return 0
+            return int((r[1] - r[0]) / step + 1e-9) + 1
+        nx, ny, nz = count(xr), count(yr), count(zr)
+        for i in range(nx):
+            x = xr[0] + i * step
+            for j in range(ny):
+                y = yr[0] + j * step
+                for k in range(nz):
+                    z = zr[0] + k * step
                     if ddiv:
-                        rho, eta = rhor[0], etar[0]
-                        while rho - rhor[1] < 1e-4 and rho - pi < 1e-4:
-                            if abs(rho) < 1e-4 or abs(rho - pi) < 1e-4:
-                                yield DirectionalPoint(x, y, z, rho, 0.0)
-                            else:
-                                while eta - etar[1] < 1e-4 and eta < 2 * pi:
-                                    yield DirectionalPoint(x, y, z, rho, eta)
-                                    eta += pi / ddiv
-                            rho += pi / ddiv
+                        for rho, eta in directions:
+                            yield DirectionalPoint(x, y, z, rho, eta)
                     else:
                         yield Point(x, y, z)
-                    z += step
-                z = zr[0]
-                y += step
-            y = yr[0]
-            x += step
 
     def _parse_task(self, task, modeltype):
         """\
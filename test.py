@@ -218,5 +218,22 @@ class TestModel01(unittest.TestCase):
         self.assertTrue(self.model.performance(self.tasks['R1']) > 0)
 
 
+class TestRangeModel(unittest.TestCase):
+    """\
+    Tests for the laser range imaging model.
+    """
+    def setUp(self):
+        self.model, self.tasks = YAMLParser('test/range.yaml').experiment
+
+    def test_range_coverage(self):
+        # The target is a single slanted triangle whose original pose blocks
+        # the laser's path to the transported task point; coverage is nonzero
+        # only if the target is masked from the occlusion cache before the
+        # scene triangles are gathered.
+        transport = self.model.LinearTargetTransport(self.model)
+        coverage = self.model.range_coverage(self.tasks['R'], transport)
+        self.assertEqual(coverage[Point(0, -200, 980)], 1.0)
+
+
 if __name__ == '__main__':
     unittest.main()